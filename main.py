@@ -1,3 +1,6 @@
+import functools
+import hashlib
+import io
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -36,51 +39,90 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_and_process_data(uploaded_file):
-    """Load and preprocess the uploaded CSV data"""
+# Low-cardinality columns stored as categoricals and summarised with value counts
+CATEGORICAL_COLS = ['brand_name', 'category_main', 'category_sub', 'color', 'price_point', 'availability']
+
+def _value_counts(series):
+    """Value counts without the zero-count entries a categorical column keeps after filtering"""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_and_process_data(file_bytes):
+    """Load and preprocess the uploaded CSV data (cached on the file contents)"""
     try:
-        df = pd.read_csv(uploaded_file)
+        # The pyarrow engine is much faster, but rejects some malformed files the C engine accepts
+        # and leaves repeated headers as duplicates; only the C engine renames them to name.1, ...
+        # Arrow-backed dtypes let Streamlit hand the columns to the frontend without converting them.
+        try:
+            df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow')
+        except ValueError:
+            df = None
+        if df is None or df.columns.duplicated().any():
+            df = pd.read_csv(io.BytesIO(file_bytes), dtype_backend='pyarrow')
         
         # Clean and process the data
-        # Convert price_amount to numeric
+        # Convert price_amount to numeric; float32 is plenty for prices and halves the column.
+        # Kept as a plain NumPy float32 so exported prices print as 129.99, not 129.99000549316406.
         if 'price_amount' in df.columns:
-            df['price_amount'] = pd.to_numeric(df['price_amount'], errors='coerce')
+            df['price_amount'] = pd.to_numeric(df['price_amount'], errors='coerce', downcast='float').astype('float32')
+        
+        # Shrink integer columns (ranks, review counts, ...) to the smallest type that fits
+        for col in df.select_dtypes(include='integer').columns.difference(CATEGORICAL_COLS):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
         
-        # Handle missing values for key columns
-        categorical_cols = ['brand_name', 'category_main', 'category_sub', 'color', 'price_point', 'availability']
-        for col in categorical_cols:
+        # Handle missing values for key columns. Cast to strings first: an all-blank column is read as
+        # null[pyarrow] and a numeric one as int64[pyarrow], and neither can hold 'Unknown'.
+        for col in CATEGORICAL_COLS:
             if col in df.columns:
-                df[col] = df[col].fillna('Unknown')
+                df[col] = df[col].astype('string[pyarrow]').fillna('Unknown').astype('category')
+        
+        # Cheap identity for downstream caches, so they never have to hash the frame itself
+        df.attrs['fingerprint'] = hashlib.sha1(file_bytes).hexdigest()
         
         return df
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _filter_options(df_key, _df):
+    """Compute the sidebar option lists and price bounds once per dataset"""
+    options = {}
+    for col in CATEGORICAL_COLS:
+        if col in _df.columns:
+            # Categories are created sorted, so no extra sort is needed
+            options[col] = ['All'] + _df[col].cat.categories.tolist()
+    
+    if 'price_amount' in _df.columns:
+        has_prices = not _df['price_amount'].isna().all()
+        options['price_min'] = float(_df['price_amount'].min()) if has_prices else 0
+        options['price_max'] = float(_df['price_amount'].max()) if has_prices else 1000
+    
+    return options
+
 def create_filters(df):
     """Create sidebar filters"""
     st.sidebar.header("🔍 Filters")
     
     filters = {}
+    options = _filter_options(df.attrs.get('fingerprint'), df)
     
     # Brand filter
-    if 'brand_name' in df.columns:
-        brands = ['All'] + sorted(df['brand_name'].unique().tolist())
-        filters['brand'] = st.sidebar.selectbox("Brand", brands)
+    if 'brand_name' in options:
+        filters['brand'] = st.sidebar.selectbox("Brand", options['brand_name'])
     
     # Category filters
-    if 'category_main' in df.columns:
-        categories = ['All'] + sorted(df['category_main'].unique().tolist())
-        filters['category_main'] = st.sidebar.selectbox("Main Category", categories)
+    if 'category_main' in options:
+        filters['category_main'] = st.sidebar.selectbox("Main Category", options['category_main'])
     
-    if 'category_sub' in df.columns:
-        sub_categories = ['All'] + sorted(df['category_sub'].unique().tolist())
-        filters['category_sub'] = st.sidebar.selectbox("Sub Category", sub_categories)
+    if 'category_sub' in options:
+        filters['category_sub'] = st.sidebar.selectbox("Sub Category", options['category_sub'])
     
     # Price range filter
-    if 'price_amount' in df.columns:
-        price_min = float(df['price_amount'].min()) if not df['price_amount'].isna().all() else 0
-        price_max = float(df['price_amount'].max()) if not df['price_amount'].isna().all() else 1000
+    if 'price_min' in options:
+        price_min = options['price_min']
+        price_max = options['price_max']
         filters['price_range'] = st.sidebar.slider(
             "Price Range ($)", 
             min_value=price_min, 
@@ -90,364 +132,399 @@ def create_filters(df):
         )
     
     # Price point filter
-    if 'price_point' in df.columns:
-        price_points = ['All'] + sorted(df['price_point'].unique().tolist())
-        filters['price_point'] = st.sidebar.selectbox("Price Point", price_points)
+    if 'price_point' in options:
+        filters['price_point'] = st.sidebar.selectbox("Price Point", options['price_point'])
     
     # Color filter
-    if 'color' in df.columns:
-        colors = ['All'] + sorted(df['color'].unique().tolist())
-        filters['color'] = st.sidebar.multiselect("Colors", colors, default=['All'])
+    if 'color' in options:
+        filters['color'] = st.sidebar.multiselect("Colors", options['color'], default=['All'])
     
     # Availability filter
-    if 'availability' in df.columns:
-        availability_options = ['All'] + sorted(df['availability'].unique().tolist())
-        filters['availability'] = st.sidebar.selectbox("Availability", availability_options)
+    if 'availability' in options:
+        filters['availability'] = st.sidebar.selectbox("Availability", options['availability'])
     
     return filters
 
-def apply_filters(df, filters):
+def _category_isin(series, values):
+    """Categorical isin() as a single lookup-table pass over the integer codes"""
+    selected = series.cat.categories.get_indexer(values)
+    # One slot per category plus a trailing False slot that missing values (code -1) index into
+    lookup = np.zeros(len(series.cat.categories) + 1, dtype=bool)
+    lookup[selected[selected >= 0]] = True
+    return lookup[series.array.codes]
+
+def apply_filters(df, filters, col_set):
     """Apply selected filters to the dataframe"""
-    filtered_df = df.copy()
+    # Combine every predicate into one mask so the frame is only indexed once
+    mask = np.ones(len(df), dtype=bool)
     
     # Apply brand filter
     if filters.get('brand') and filters['brand'] != 'All':
-        filtered_df = filtered_df[filtered_df['brand_name'] == filters['brand']]
+        mask &= (df['brand_name'] == filters['brand']).to_numpy()
     
     # Apply category filters
     if filters.get('category_main') and filters['category_main'] != 'All':
-        filtered_df = filtered_df[filtered_df['category_main'] == filters['category_main']]
+        mask &= (df['category_main'] == filters['category_main']).to_numpy()
     
     if filters.get('category_sub') and filters['category_sub'] != 'All':
-        filtered_df = filtered_df[filtered_df['category_sub'] == filters['category_sub']]
+        mask &= (df['category_sub'] == filters['category_sub']).to_numpy()
     
     # Apply price range filter
-    if filters.get('price_range') and 'price_amount' in filtered_df.columns:
+    if filters.get('price_range') and 'price_amount' in col_set:
         min_price, max_price = filters['price_range']
-        filtered_df = filtered_df[
-            (filtered_df['price_amount'] >= min_price) & 
-            (filtered_df['price_amount'] <= max_price)
-        ]
+        prices = df['price_amount'].to_numpy()
+        mask &= prices >= min_price
+        mask &= prices <= max_price
     
     # Apply price point filter
     if filters.get('price_point') and filters['price_point'] != 'All':
-        filtered_df = filtered_df[filtered_df['price_point'] == filters['price_point']]
+        mask &= (df['price_point'] == filters['price_point']).to_numpy()
     
     # Apply color filter
     if filters.get('color') and 'All' not in filters['color']:
-        filtered_df = filtered_df[filtered_df['color'].isin(filters['color'])]
+        mask &= _category_isin(df['color'], filters['color'])
     
     # Apply availability filter
     if filters.get('availability') and filters['availability'] != 'All':
-        filtered_df = filtered_df[filtered_df['availability'] == filters['availability']]
+        mask &= (df['availability'] == filters['availability']).to_numpy()
+    
+    # Nothing filtered out: hand back the original frame rather than a full copy
+    if np.all(mask):
+        return df
     
+    filtered_df = df.loc[mask]
+    # Identify the subset by its source data and the exact rows kept
+    mask_digest = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+    filtered_df.attrs['fingerprint'] = f"{df.attrs.get('fingerprint')}:{mask_digest}"
     return filtered_df
 
-def create_overview_metrics(df):
+@st.cache_data(show_spinner=False, max_entries=8)
+def _compute_aggregates(df_key, _df):
+    """Compute the metric and chart aggregates once per (filtered) dataset"""
+    # One value_counts pass per categorical column, shared by the overview metrics and the charts
+    value_counts = {col: _value_counts(_df[col]) for col in CATEGORICAL_COLS if col in _df.columns}
+    aggregates = {'value_counts': value_counts}
+    
+    if 'price_point' in _df.columns:
+        aggregates['price_point_counts'] = value_counts['price_point']
+    
+    if 'brand_name' in _df.columns:
+        aggregates['brand_counts'] = value_counts['brand_name'].head(10)
+        if 'price_amount' in _df.columns:
+            aggregates['brand_avg_price'] = _df.groupby('brand_name', observed=True)['price_amount'].mean().nlargest(10)
+    
+    if 'category_main' in _df.columns:
+        aggregates['category_counts'] = value_counts['category_main']
+    
+    if 'category_sub' in _df.columns:
+        aggregates['sub_category_counts'] = value_counts['category_sub'].head(10)
+    
+    if 'color' in _df.columns:
+        aggregates['color_counts'] = value_counts['color'].head(10)
+        if 'price_amount' in _df.columns:
+            aggregates['color_price'] = _df.groupby('color', observed=True)['price_amount'].mean().nlargest(10)
+    
+    if 'availability' in _df.columns:
+        availability_counts = value_counts['availability']
+        aggregates['availability_counts'] = availability_counts
+        # Match against the distinct availability labels rather than every row
+        aggregates['in_stock'] = int(availability_counts[
+            availability_counts.index.astype(str).str.contains('in stock', case=False, regex=False)
+        ].sum())
+    
+    if 'category_main' in _df.columns and 'price_point' in _df.columns:
+        # Per (category, price point) counts and average prices in a single groupby, shared by every chart style
+        grouped = _df.groupby(['category_main', 'price_point'], observed=True)
+        category_price_counts = grouped.size()
+        category_price_agg = category_price_counts.rename('count').to_frame()
+        if 'price_amount' in _df.columns:
+            category_price_agg['avg_price'] = grouped['price_amount'].mean()
+        else:
+            category_price_agg['avg_price'] = 0
+        category_price_agg = category_price_agg.reset_index().astype({'category_main': str, 'price_point': str})
+        aggregates['category_price_agg'] = category_price_agg
+        
+        # Category x price point count table for the bar charts
+        aggregates['category_price_data'] = category_price_counts.unstack('price_point', fill_value=0)
+    
+    return aggregates
+
+def create_overview_metrics(df, col_set):
     """Create overview metrics"""
+    aggregates = _compute_aggregates(df.attrs.get('fingerprint'), df)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric("Total Products", len(df))
     
     with col2:
-        if 'brand_name' in df.columns:
-            st.metric("Unique Brands", df['brand_name'].nunique())
+        if 'brand_name' in col_set:
+            st.metric("Unique Brands", len(aggregates['value_counts']['brand_name']))
     
     with col3:
-        if 'price_amount' in df.columns:
+        if 'price_amount' in col_set:
             avg_price = df['price_amount'].mean()
             st.metric("Average Price", f"${avg_price:.2f}" if not pd.isna(avg_price) else "N/A")
     
     with col4:
-        if 'availability' in df.columns:
-            in_stock = len(df[df['availability'].str.contains('in stock', case=False, na=False)])
-            st.metric("In Stock", in_stock)
+        if 'availability' in col_set:
+            st.metric("In Stock", aggregates['in_stock'])
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _bar_figure(series, title, color, horizontal=False, tickangle=None, layout=None):
+    """Bar chart of a small aggregate, cached on its contents as a plain figure dict"""
+    if horizontal:
+        fig = px.bar(x=series.values, y=series.index, orientation='h', title=title, color_discrete_sequence=[color])
+    else:
+        fig = px.bar(x=series.index, y=series.values, title=title, color_discrete_sequence=[color])
+    if tickangle is not None:
+        fig.update_xaxes(tickangle=tickangle)
+    if layout:
+        fig.update_layout(layout)
+    return fig.to_dict()
 
-def create_visualizations(df):
+@st.cache_data(show_spinner=False, max_entries=32)
+def _pie_figure(series, title):
+    """Pie chart of a small aggregate, cached on its contents as a plain figure dict"""
+    return px.pie(values=series.values, names=series.index, title=title).to_dict()
+
+def _fast_hist(series, bins=20, color='#667eea'):
+    """Histogram binned with NumPy, so the figure carries one bar per bin instead of every value"""
+    counts, edges = np.histogram(series.dropna().to_numpy(), bins=bins)
+    fig = go.Figure(go.Bar(
+        x=0.5 * (edges[:-1] + edges[1:]),
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color
+    ))
+    fig.update_layout(bargap=0)
+    return fig
+
+@st.fragment
+def create_category_price_section(col_set, aggregates):
+    """Category vs price point charts; changing the chart style reruns only this section"""
+    st.subheader("🔥 Category vs Price Point Analysis")
+    
+    # Let user choose visualization type
+    viz_type = st.selectbox(
+        "Choose visualization style:",
+        ["Grouped Bar Chart", "Stacked Bar Chart", "Sunburst Chart", "Treemap", "Bubble Chart"]
+    )
+    
+    # Prepare data
+    category_price_agg = aggregates['category_price_agg']
+    category_price_data = aggregates['category_price_data']
+    
+    if viz_type == "Grouped Bar Chart":
+        # Grouped bar chart - much clearer than heatmap
+        fig = go.Figure()
+        colors = ['#667eea', '#764ba2', '#f093fb', '#fa709a', '#fee140']
+        
+        for i, price_point in enumerate(category_price_data.columns):
+            fig.add_trace(go.Bar(
+                name=price_point,
+                x=category_price_data.index,
+                y=category_price_data[price_point],
+                marker_color=colors[i % len(colors)]
+            ))
+        
+        fig.update_layout(
+            title="Product Count by Category and Price Point",
+            xaxis_title="Category",
+            yaxis_title="Number of Products",
+            barmode='group',
+            height=500
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+    elif viz_type == "Stacked Bar Chart":
+        # Stacked bar chart showing proportions
+        fig = go.Figure()
+        colors = ['#667eea', '#764ba2', '#f093fb', '#fa709a', '#fee140']
+        
+        for i, price_point in enumerate(category_price_data.columns):
+            fig.add_trace(go.Bar(
+                name=price_point,
+                x=category_price_data.index,
+                y=category_price_data[price_point],
+                marker_color=colors[i % len(colors)]
+            ))
+        
+        fig.update_layout(
+            title="Product Distribution by Category and Price Point (Stacked)",
+            xaxis_title="Category",
+            yaxis_title="Number of Products",
+            barmode='stack',
+            height=500
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+    elif viz_type == "Sunburst Chart":
+        # Sunburst chart for hierarchical view
+        # Prepare data for sunburst: price point leaves plus one parent row per category
+        if not category_price_agg.empty:
+            category_totals = category_price_agg.groupby('category_main')['count'].sum()
+            sunburst_df = pd.concat([
+                pd.DataFrame({
+                    'ids': category_price_agg['category_main'] + '-' + category_price_agg['price_point'],
+                    'labels': category_price_agg['price_point'],
+                    'parents': category_price_agg['category_main'],
+                    'values': category_price_agg['count']
+                }),
+                pd.DataFrame({
+                    'ids': category_totals.index,
+                    'labels': category_totals.index,
+                    'parents': "",
+                    'values': category_totals.values
+                })
+            ], ignore_index=True)
+            fig = go.Figure(go.Sunburst(
+                ids=sunburst_df['ids'],
+                labels=sunburst_df['labels'],
+                parents=sunburst_df['parents'],
+                values=sunburst_df['values'],
+                branchvalues="total",
+            ))
+            fig.update_layout(
+                title="Category and Price Point Hierarchy",
+                height=600
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+    elif viz_type == "Treemap":
+        # Treemap for proportional visualization
+        if not category_price_agg.empty:
+            treemap_df = category_price_agg.rename(columns={'category_main': 'category'})
+            fig = px.treemap(
+                treemap_df,
+                path=['category', 'price_point'],
+                values='count',
+                title='Category vs Price Point Distribution (Treemap)',
+                color='count',
+                color_continuous_scale='Viridis'
+            )
+            fig.update_layout(height=600)
+            st.plotly_chart(fig, use_container_width=True)
+            
+    elif viz_type == "Bubble Chart":
+        # Bubble chart with category on x-axis, price_point on y-axis, size as count
+        if not category_price_agg.empty:
+            bubble_df = category_price_agg.rename(columns={'category_main': 'category'})
+            fig = px.scatter(
+                bubble_df,
+                x='category',
+                y='price_point',
+                size='count',
+                color='avg_price' if 'price_amount' in col_set else 'count',
+                hover_data=['count'],
+                title='Category vs Price Point (Bubble Chart)',
+                color_continuous_scale='Plasma',
+                size_max=60
+            )
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
+
+def create_visualizations(df, col_set):
     """Create various visualizations"""
+    aggregates = _compute_aggregates(df.attrs.get('fingerprint'), df)
     
     # Price Distribution
-    if 'price_amount' in df.columns and not df['price_amount'].isna().all():
+    if 'price_amount' in col_set and not df['price_amount'].isna().all():
         st.subheader("💰 Price Distribution")
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_hist = px.histogram(
-                df, 
-                x='price_amount', 
-                nbins=20, 
+            fig_hist = _fast_hist(df['price_amount'])
+            fig_hist.update_layout(
                 title="Price Distribution",
-                color_discrete_sequence=['#667eea']
+                xaxis_title="price_amount",
+                yaxis_title="count",
+                showlegend=False
             )
-            fig_hist.update_layout(showlegend=False)
             st.plotly_chart(fig_hist, use_container_width=True)
         
         with col2:
-            if 'price_point' in df.columns:
-                price_point_counts = df['price_point'].value_counts()
-                fig_pie = px.pie(
-                    values=price_point_counts.values,
-                    names=price_point_counts.index,
-                    title="Price Point Distribution"
+            if 'price_point' in col_set:
+                st.plotly_chart(
+                    _pie_figure(aggregates['price_point_counts'], "Price Point Distribution"),
+                    use_container_width=True
                 )
-                st.plotly_chart(fig_pie, use_container_width=True)
     
     # Brand Analysis
-    if 'brand_name' in df.columns:
+    if 'brand_name' in col_set:
         st.subheader("🏷️ Brand Analysis")
         col1, col2 = st.columns(2)
         
         with col1:
-            brand_counts = df['brand_name'].value_counts().head(10)
-            fig_brand = px.bar(
-                x=brand_counts.values,
-                y=brand_counts.index,
-                orientation='h',
-                title="Top 10 Brands by Product Count",
-                color_discrete_sequence=['#764ba2']
+            st.plotly_chart(
+                _bar_figure(
+                    aggregates['brand_counts'], "Top 10 Brands by Product Count", '#764ba2',
+                    horizontal=True, layout={'yaxis': {'categoryorder': 'total ascending'}}
+                ),
+                use_container_width=True
             )
-            fig_brand.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig_brand, use_container_width=True)
         
         with col2:
-            if 'price_amount' in df.columns:
-                brand_avg_price = df.groupby('brand_name')['price_amount'].mean().sort_values(ascending=False).head(10)
-                fig_brand_price = px.bar(
-                    x=brand_avg_price.index,
-                    y=brand_avg_price.values,
-                    title="Average Price by Brand (Top 10)",
-                    color_discrete_sequence=['#667eea']
+            if 'price_amount' in col_set:
+                st.plotly_chart(
+                    _bar_figure(aggregates['brand_avg_price'], "Average Price by Brand (Top 10)", '#667eea', tickangle=45),
+                    use_container_width=True
                 )
-                fig_brand_price.update_xaxes(tickangle=45)
-                st.plotly_chart(fig_brand_price, use_container_width=True)
     
     # Category Analysis
-    if 'category_main' in df.columns:
+    if 'category_main' in col_set:
         st.subheader("📂 Category Analysis")
         col1, col2 = st.columns(2)
         
         with col1:
-            category_counts = df['category_main'].value_counts()
-            fig_category = px.pie(
-                values=category_counts.values,
-                names=category_counts.index,
-                title="Product Distribution by Main Category"
+            st.plotly_chart(
+                _pie_figure(aggregates['category_counts'], "Product Distribution by Main Category"),
+                use_container_width=True
             )
-            st.plotly_chart(fig_category, use_container_width=True)
         
         with col2:
-            if 'category_sub' in df.columns:
-                sub_category_counts = df['category_sub'].value_counts().head(10)
-                fig_sub_category = px.bar(
-                    x=sub_category_counts.values,
-                    y=sub_category_counts.index,
-                    orientation='h',
-                    title="Top 10 Sub-Categories",
-                    color_discrete_sequence=['#f093fb']
+            if 'category_sub' in col_set:
+                st.plotly_chart(
+                    _bar_figure(aggregates['sub_category_counts'], "Top 10 Sub-Categories", '#f093fb', horizontal=True),
+                    use_container_width=True
                 )
-                st.plotly_chart(fig_sub_category, use_container_width=True)
     
     # Color Analysis
-    if 'color' in df.columns:
+    if 'color' in col_set:
         st.subheader("🎨 Color Analysis")
         col1, col2 = st.columns(2)
         
         with col1:
-            color_counts = df['color'].value_counts().head(10)
-            fig_color = px.bar(
-                x=color_counts.index,
-                y=color_counts.values,
-                title="Top 10 Colors",
-                color_discrete_sequence=['#fa709a']
+            st.plotly_chart(
+                _bar_figure(aggregates['color_counts'], "Top 10 Colors", '#fa709a', tickangle=45),
+                use_container_width=True
             )
-            fig_color.update_xaxes(tickangle=45)
-            st.plotly_chart(fig_color, use_container_width=True)
         
         with col2:
-            if 'price_amount' in df.columns:
-                color_price = df.groupby('color')['price_amount'].mean().sort_values(ascending=False).head(10)
-                fig_color_price = px.bar(
-                    x=color_price.index,
-                    y=color_price.values,
-                    title="Average Price by Color (Top 10)",
-                    color_discrete_sequence=['#fee140']
+            if 'price_amount' in col_set:
+                st.plotly_chart(
+                    _bar_figure(aggregates['color_price'], "Average Price by Color (Top 10)", '#fee140', tickangle=45),
+                    use_container_width=True
                 )
-                fig_color_price.update_xaxes(tickangle=45)
-                st.plotly_chart(fig_color_price, use_container_width=True)
     
     # Availability Analysis
-    if 'availability' in df.columns:
+    if 'availability' in col_set:
         st.subheader("📦 Availability Analysis")
-        availability_counts = df['availability'].value_counts()
-        fig_availability = px.bar(
-            x=availability_counts.index,
-            y=availability_counts.values,
-            title="Product Availability Status",
-            color_discrete_sequence=['#667eea']
+        st.plotly_chart(
+            _bar_figure(aggregates['availability_counts'], "Product Availability Status", '#667eea'),
+            use_container_width=True
         )
-        st.plotly_chart(fig_availability, use_container_width=True)
     
     # Price vs Category Analysis - Multiple Chart Options
-    if 'category_main' in df.columns and 'price_point' in df.columns:
-        st.subheader("🔥 Category vs Price Point Analysis")
-        
-        # Let user choose visualization type
-        viz_type = st.selectbox(
-            "Choose visualization style:",
-            ["Grouped Bar Chart", "Stacked Bar Chart", "Sunburst Chart", "Treemap", "Bubble Chart"]
-        )
-        
-        # Prepare data
-        category_price_data = pd.crosstab(df['category_main'], df['price_point'])
-        
-        if viz_type == "Grouped Bar Chart":
-            # Grouped bar chart - much clearer than heatmap
-            fig = go.Figure()
-            colors = ['#667eea', '#764ba2', '#f093fb', '#fa709a', '#fee140']
-            
-            for i, price_point in enumerate(category_price_data.columns):
-                fig.add_trace(go.Bar(
-                    name=price_point,
-                    x=category_price_data.index,
-                    y=category_price_data[price_point],
-                    marker_color=colors[i % len(colors)]
-                ))
-            
-            fig.update_layout(
-                title="Product Count by Category and Price Point",
-                xaxis_title="Category",
-                yaxis_title="Number of Products",
-                barmode='group',
-                height=500
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-        elif viz_type == "Stacked Bar Chart":
-            # Stacked bar chart showing proportions
-            fig = go.Figure()
-            colors = ['#667eea', '#764ba2', '#f093fb', '#fa709a', '#fee140']
-            
-            for i, price_point in enumerate(category_price_data.columns):
-                fig.add_trace(go.Bar(
-                    name=price_point,
-                    x=category_price_data.index,
-                    y=category_price_data[price_point],
-                    marker_color=colors[i % len(colors)]
-                ))
-            
-            fig.update_layout(
-                title="Product Distribution by Category and Price Point (Stacked)",
-                xaxis_title="Category",
-                yaxis_title="Number of Products",
-                barmode='stack',
-                height=500
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-        elif viz_type == "Sunburst Chart":
-            # Sunburst chart for hierarchical view
-            # Prepare data for sunburst
-            sunburst_data = []
-            for category in df['category_main'].unique():
-                if pd.notna(category):
-                    cat_data = df[df['category_main'] == category]
-                    for price_point in cat_data['price_point'].unique():
-                        if pd.notna(price_point):
-                            count = len(cat_data[cat_data['price_point'] == price_point])
-                            sunburst_data.append({
-                                'ids': f"{category}-{price_point}",
-                                'labels': price_point,
-                                'parents': category,
-                                'values': count
-                            })
-                    # Add parent category
-                    sunburst_data.append({
-                        'ids': category,
-                        'labels': category,
-                        'parents': "",
-                        'values': len(cat_data)
-                    })
-            
-            if sunburst_data:
-                sunburst_df = pd.DataFrame(sunburst_data)
-                fig = go.Figure(go.Sunburst(
-                    ids=sunburst_df['ids'],
-                    labels=sunburst_df['labels'],
-                    parents=sunburst_df['parents'],
-                    values=sunburst_df['values'],
-                    branchvalues="total",
-                ))
-                fig.update_layout(
-                    title="Category and Price Point Hierarchy",
-                    height=600
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-        elif viz_type == "Treemap":
-            # Treemap for proportional visualization
-            treemap_data = []
-            for category in df['category_main'].unique():
-                if pd.notna(category):
-                    cat_data = df[df['category_main'] == category]
-                    for price_point in cat_data['price_point'].unique():
-                        if pd.notna(price_point):
-                            count = len(cat_data[cat_data['price_point'] == price_point])
-                            treemap_data.append({
-                                'category': category,
-                                'price_point': price_point,
-                                'count': count,
-                                'label': f"{category}<br>{price_point}<br>({count} items)"
-                            })
-            
-            if treemap_data:
-                treemap_df = pd.DataFrame(treemap_data)
-                fig = px.treemap(
-                    treemap_df,
-                    path=['category', 'price_point'],
-                    values='count',
-                    title='Category vs Price Point Distribution (Treemap)',
-                    color='count',
-                    color_continuous_scale='Viridis'
-                )
-                fig.update_layout(height=600)
-                st.plotly_chart(fig, use_container_width=True)
-                
-        elif viz_type == "Bubble Chart":
-            # Bubble chart with category on x-axis, price_point on y-axis, size as count
-            bubble_data = []
-            for category in df['category_main'].unique():
-                if pd.notna(category):
-                    cat_data = df[df['category_main'] == category]
-                    for price_point in cat_data['price_point'].unique():
-                        if pd.notna(price_point):
-                            count = len(cat_data[cat_data['price_point'] == price_point])
-                            if 'price_amount' in df.columns:
-                                avg_price = cat_data[cat_data['price_point'] == price_point]['price_amount'].mean()
-                            else:
-                                avg_price = 0
-                            bubble_data.append({
-                                'category': category,
-                                'price_point': price_point,
-                                'count': count,
-                                'avg_price': avg_price
-                            })
-            
-            if bubble_data:
-                bubble_df = pd.DataFrame(bubble_data)
-                fig = px.scatter(
-                    bubble_df,
-                    x='category',
-                    y='price_point',
-                    size='count',
-                    color='avg_price' if 'price_amount' in df.columns else 'count',
-                    hover_data=['count'],
-                    title='Category vs Price Point (Bubble Chart)',
-                    color_continuous_scale='Plasma',
-                    size_max=60
-                )
-                fig.update_layout(height=500)
-                st.plotly_chart(fig, use_container_width=True)
+    if 'category_main' in col_set and 'price_point' in col_set:
+        create_category_price_section(col_set, aggregates)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _csv_bytes(df_key, columns, _df):
+    """Encode the selected columns as CSV once per (filtered) dataset and column selection"""
+    buffer = io.BytesIO()
+    _df[list(columns)].to_csv(buffer, index=False)
+    return buffer.getvalue()
 
 def create_data_table(df):
     """Create an interactive data table"""
@@ -456,7 +533,7 @@ def create_data_table(df):
     # Select columns to display
     display_columns = st.multiselect(
         "Select columns to display:",
-        df.columns.tolist(),
+        df.columns,
         default=['name', 'brand_name', 'category_main', 'price_amount', 'color', 'availability'][:min(6, len(df.columns))]
     )
     
@@ -468,7 +545,8 @@ def create_data_table(df):
         )
         
         # Download button
-        csv = df[display_columns].to_csv(index=False)
+        # Encoded only when the button is clicked, not on every rerun
+        csv = functools.partial(_csv_bytes, df.attrs.get('fingerprint'), tuple(display_columns), df)
         st.download_button(
             label="Download filtered data as CSV",
             data=csv,
@@ -495,16 +573,19 @@ def main():
     
     if uploaded_file is not None:
         # Load data
-        df = load_and_process_data(uploaded_file)
+        df = load_and_process_data(uploaded_file.getvalue())
         
         if df is not None:
             st.success(f"Successfully loaded {len(df)} products!")
             
+            # Column membership is checked all over the page; look it up in a set built once
+            col_set = frozenset(df.columns)
+            
             # Create filters
             filters = create_filters(df)
             
             # Apply filters
-            filtered_df = apply_filters(df, filters)
+            filtered_df = apply_filters(df, filters, col_set)
             
             # Show filtered results count
             if len(filtered_df) != len(df):
@@ -512,12 +593,12 @@ def main():
             
             # Overview metrics
             st.header("📈 Overview")
-            create_overview_metrics(filtered_df)
+            create_overview_metrics(filtered_df, col_set)
             
             # Visualizations
             st.header("📊 Analytics")
             if len(filtered_df) > 0:
-                create_visualizations(filtered_df)
+                create_visualizations(filtered_df, col_set)
             else:
                 st.warning("No data available with current filters. Please adjust your filters.")
             
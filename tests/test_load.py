@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def test_blank_categorical_column_loads():
+    """An all-blank categorical column is read as null[pyarrow] and must still fill with 'Unknown'"""
+    csv = b"name,brand_name,color,price_amount,price_point,availability\na,X,,10,low,in stock\nb,Y,,20,high,sold out\n"
+    df = main.load_and_process_data(csv)
+    assert df is not None
+    assert df['color'].cat.categories.tolist() == ['Unknown']
+
+
+def test_numeric_categorical_column_with_blank_loads():
+    """A numeric categorical column with a blank cell must not be downcast to an int type that rejects 'Unknown'"""
+    csv = b"name,brand_name,color,price_amount,price_point,availability\na,X,Red,10,1,in stock\nb,Y,Blue,20,,sold out\n"
+    df = main.load_and_process_data(csv)
+    assert df is not None
+    assert df['price_point'].cat.categories.tolist() == ['1', 'Unknown']
+
+
+def test_repeated_headers_are_renamed_like_the_c_engine():
+    """Repeated headers must be deduplicated the way pandas does, even when a suffixed name already exists"""
+    df = main.load_and_process_data(b"a,a,a.1\n1,2,3\n")
+    assert df is not None
+    assert df.columns.tolist() == ['a', 'a.2', 'a.1']